@@ -1,52 +1,373 @@
 """This is a template for Auto-GPT plugins."""
-import abc
-from typing import Any, Dict, List, Optional, Tuple, TypeVar, TypedDict
-
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    MutableMapping,
+    Optional,
+    Protocol,
+    Set,
+    Tuple,
+)
+
+import discord
 from abstract_singleton import AbstractSingleton, Singleton
+from discord.ext import commands
+
+from ._dispatch import (  # noqa: F401
+    H_CHAT_COMPLETION,
+    H_ON_INSTRUCTION,
+    H_ON_PLANNING,
+    H_ON_RESPONSE,
+    H_POST_COMMAND,
+    H_POST_INSTRUCTION,
+    H_POST_INSTRUCTION_BATCH,
+    H_POST_PLANNING,
+    H_POST_PROMPT,
+    H_PRE_COMMAND,
+    H_PRE_INSTRUCTION,
+    HOOK_BITS,
+    HOOKS,
+    PluginRegistry,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class PromptGenerator(Protocol):
+    """The part of Auto-GPT's prompt generator that plugins use."""
+
+    def add_constraint(self, constraint: str) -> None:
+        ...
+
+    def add_command(
+        self,
+        command_label: str,
+        command_name: str,
+        args: Optional[Dict[str, str]] = None,
+        function: Optional[Callable] = None,
+    ) -> None:
+        ...
+
+    def add_resource(self, resource: str) -> None:
+        ...
+
+    def add_performance_evaluation(self, evaluation: str) -> None:
+        ...
+
+    def generate_prompt_string(self) -> str:
+        ...
 
-PromptGenerator = TypeVar("PromptGenerator")
 
+@dataclass(frozen=True)
+class Message:
+    """A chat message, slotted to keep long message lists compact."""
+
+    __slots__ = ("role", "content")
 
-class Message(TypedDict):
     role: str
     content: str
 
+    # Frozen slotted instances can't be restored through __setattr__, which
+    # copy and pickle use by default.
+    def __getstate__(self) -> Tuple[str, str]:
+        return (self.role, self.content)
+
+    def __setstate__(self, state: Tuple[str, str]) -> None:
+        object.__setattr__(self, "role", state[0])
+        object.__setattr__(self, "content", state[1])
+
+    def as_dict(self) -> Dict[str, str]:
+        """Convert the message to the dict shape of the OpenAI API.
+
+        Returns:
+            Dict[str, str]: The role and content of the message."""
+        return {"role": self.role, "content": self.content}
+
+
+class MessageBatch:
+    """
+    A list of messages stored as parallel role and content lists, for scans
+    that only read one of the fields.
+    """
+
+    __slots__ = ("roles", "contents")
 
-class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
+    def __init__(self, messages: List[Message]):
+        self.roles: List[str] = [message.role for message in messages]
+        self.contents: List[str] = [message.content for message in messages]
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def total_chars(self) -> int:
+        """Count the characters of all the message contents.
+
+        Returns:
+            int: The total content length."""
+        return sum(map(len, self.contents))
+
+    def to_messages(self) -> List[Message]:
+        """Convert the batch back to a list of messages.
+
+        Returns:
+            List[Message]: The messages."""
+        return list(map(Message, self.roles, self.contents))
+
+
+def to_openai(messages: List[Message]) -> List[Dict[str, str]]:
+    """Convert messages to the OpenAI API format at the API boundary.
+
+    Args:
+        messages (List[Message]): The messages.
+
+    Returns:
+        List[Dict[str, str]]: The messages as dicts.
+    """
+    return [message.as_dict() for message in messages]
+
+
+class ThreadSafeSingleton(Singleton):
+    """
+    Singleton metaclass that creates each instance under a lock, while
+    returning existing instances without taking it.
+    """
+
+    _instance_lock = threading.RLock()
+
+    def __call__(cls, *args, **kwargs):
+        instance = cls._instances.get(cls)
+        if instance is not None:
+            return instance
+        with cls._instance_lock:
+            instance = cls._instances.get(cls)
+            if instance is None:
+                # Bypass Singleton.__call__, which would repeat the lookup.
+                instance = type.__call__(cls, *args, **kwargs)
+                cls._instances[cls] = instance
+        return instance
+
+
+# The method the host calls for each hook.
+_HOOK_METHODS = {
+    name: "handle_chat_completion" if name == "chat_completion" else name
+    for name in HOOKS
+}
+
+
+def hook(name: str) -> Callable[[Callable], Callable]:
+    """Decorator registering a plugin method as the implementation of a hook,
+    which also makes the plugin's can_handle_* method answer True for it.
+
+    The method must have the name the host calls the hook by, the hook name
+    itself or handle_chat_completion for chat_completion.
+
+    Args:
+        name (str): The hook name, see HOOKS.
+
+    Returns:
+        Callable[[Callable], Callable]: The decorator.
+    """
+    if name not in HOOK_BITS:
+        raise ValueError(f"Unknown hook: {name}")
+
+    def decorator(method: Callable) -> Callable:
+        setattr(method, "_hook_name", name)
+        return method
+
+    return decorator
+
+
+class PluginMeta(ThreadSafeSingleton):
+    """
+    Plugin metaclass mapping the hooks registered with @hook to the names of
+    their methods in the class's _hook_impls, including the ones inherited
+    from its bases.
+    """
+
+    def __init__(cls, name, bases, namespace, **kwargs):
+        super().__init__(name, bases, namespace, **kwargs)
+        hook_impls = dict(getattr(cls, "_hook_impls", {}))
+        for attr, value in namespace.items():
+            hook_name = getattr(value, "_hook_name", None)
+            if hook_name is not None:
+                if attr != _HOOK_METHODS[hook_name]:
+                    raise TypeError(
+                        f"{name}.{attr} implements the {hook_name} hook, "
+                        f"it must be named {_HOOK_METHODS[hook_name]}"
+                    )
+                hook_impls[hook_name] = attr
+        cls._hook_impls = hook_impls
+
+
+class AutoGPTPluginTemplate(AbstractSingleton, metaclass=PluginMeta):
     """
     This is a template for Auto-GPT plugins.
     """
 
-    def __init__(self):
-        super().__init__()
-        self._name = "Auto-GPT-Plugin-Template"
-        self._version = "0.1.0"
-        self._description = "This is a template for Auto-GPT plugins."
+    _name: str = "Auto-GPT-Plugin-Template"
+    _version: str = "0.1.0"
+    _description: str = "This is a template for Auto-GPT plugins."
+    _hook_mask: Optional[int] = None
+    _chat_completion_answers: Optional[
+        "OrderedDict[Tuple[str, float, int], bool]"
+    ] = None
+    _chat_completion_cache_size: int = 128
+
+    def descriptor(self) -> Tuple[str, str, str]:
+        """Get the plugin's name, version and description.
+
+        Plugins set them as class attributes, the values are read from the
+        instance so plugins assigning them in __init__ keep working.
+
+        Returns:
+            Tuple[str, str, str]: The plugin descriptor."""
+        return (self._name, self._version, self._description)
+
+    @classmethod
+    def declared_hooks(cls) -> FrozenSet[str]:
+        """Find the hooks registered with @hook or whose can_handle_* method
+        the plugin overrides, without calling them.
+
+        Returns:
+            FrozenSet[str]: The names of the declared hooks, see HOOKS."""
+        return frozenset(
+            name
+            for name in HOOKS
+            if name in cls._hook_impls
+            or getattr(cls, f"can_handle_{name}")
+            is not getattr(AutoGPTPluginTemplate, f"can_handle_{name}")
+        )
+
+    def get_hook(self, name: str) -> Optional[Callable]:
+        """Get the method registered with @hook for a hook.
+
+        Args:
+            name (str): The hook name, see HOOKS.
+
+        Returns:
+            Optional[Callable]: The bound method, None if there is none."""
+        attr = self._hook_impls.get(name)
+        return None if attr is None else getattr(self, attr)
+
+    def _compute_hook_mask(self) -> int:
+        """Ask each declared can_handle_* method once and pack the answers
+        into a bitmask.
+
+        can_handle_chat_completion depends on its arguments, so its bit is set
+        whenever it is declared and the host asks per call, see
+        can_handle_chat_completion_cached.
+
+        Returns:
+            int: The bitmask of supported hooks, see HOOK_BITS."""
+        mask = 0
+        for name in self.declared_hooks():
+            if name == "chat_completion" or getattr(self, f"can_handle_{name}")():
+                mask |= HOOK_BITS[name]
+        return mask
+
+    def hook_mask(self) -> int:
+        """Get the hook mask, computing it on first use so the can_handle_*
+        methods only run once the plugin is fully constructed.
+
+        Returns:
+            int: The bitmask of supported hooks, see HOOK_BITS."""
+        mask = self._hook_mask
+        if mask is None:
+            mask = self._hook_mask = self._compute_hook_mask()
+        return mask
+
+    def has_hook(self, hook_id: int) -> bool:
+        """Check the precomputed hook mask.
+
+        Args:
+            hook_id (int): One of the H_* hook bits.
+
+        Returns:
+            bool: True if the plugin handles the hook."""
+        return bool(self.hook_mask() & hook_id)
+
+    def invalidate_capabilities(self) -> None:
+        """Forget the can_handle_* answers memoized in the hook mask. Call it
+        after a configuration change, then PluginRegistry.reindex() on the
+        registries holding the plugin."""
+        self._hook_mask = None
+        self._chat_completion_answers = None
+
+    def can_handle_chat_completion_cached(
+        self, messages: List[Message], model: str, temperature: float, max_tokens: int
+    ) -> bool:
+        """Ask can_handle_chat_completion, remembering the answer for the
+        last _chat_completion_cache_size (model, temperature, max_tokens)
+        combinations.
+
+        The messages are not part of the key, plugins whose answer depends on
+        them set _chat_completion_cache_size to 0.
+
+        Args:
+            messages (List[Message]): The messages.
+            model (str): The model name.
+            temperature (float): The temperature.
+            max_tokens (int): The max tokens.
+
+        Returns:
+            bool: True if the plugin can handle the chat_completion method."""
+        if self._chat_completion_cache_size <= 0:
+            return self.can_handle_chat_completion(
+                messages, model, temperature, max_tokens
+            )
+        answers = self._chat_completion_answers
+        if answers is None:
+            answers = self._chat_completion_answers = OrderedDict()
+        key = (model, temperature, max_tokens)
+        answer = answers.get(key)
+        if answer is None:
+            answer = answers[key] = self.can_handle_chat_completion(
+                messages, model, temperature, max_tokens
+            )
+            if len(answers) > self._chat_completion_cache_size:
+                answers.popitem(last=False)
+        else:
+            answers.move_to_end(key)
+        return answer
 
-    @abc.abstractmethod
     def can_handle_on_response(self) -> bool:
         """This method is called to check that the plugin can
         handle the on_response method.
 
         Returns:
             bool: True if the plugin can handle the on_response method."""
-        return False
+        return "on_response" in self._hook_impls
+
+    def on_response(self, response: str, channel_id: Optional[int] = None) -> str:
+        """This method is called when a response is received from the model.
 
-    @abc.abstractmethod
-    def on_response(self, response: str, *args, **kwargs) -> str:
-        """This method is called when a response is received from the model."""
-        pass
+        Args:
+            response (str): The response.
+            channel_id (Optional[int]): The channel the response belongs to.
+
+        Returns:
+            str: The resulting response.
+        """
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_post_prompt(self) -> bool:
         """This method is called to check that the plugin can
         handle the post_prompt method.
 
         Returns:
             bool: True if the plugin can handle the post_prompt method."""
-        return False
+        return "post_prompt" in self._hook_impls
 
-    @abc.abstractmethod
     def post_prompt(self, prompt: PromptGenerator) -> PromptGenerator:
         """This method is called just after the generate_prompt is called,
             but actually before the prompt is generated.
@@ -57,18 +378,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             PromptGenerator: The prompt generator.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_on_planning(self) -> bool:
         """This method is called to check that the plugin can
         handle the on_planning method.
 
         Returns:
             bool: True if the plugin can handle the on_planning method."""
-        return False
+        return "on_planning" in self._hook_impls
 
-    @abc.abstractmethod
     def on_planning(
         self, prompt: PromptGenerator, messages: List[Message]
     ) -> Optional[str]:
@@ -78,18 +397,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
             prompt (PromptGenerator): The prompt generator.
             messages (List[str]): The list of messages.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_post_planning(self) -> bool:
         """This method is called to check that the plugin can
         handle the post_planning method.
 
         Returns:
             bool: True if the plugin can handle the post_planning method."""
-        return False
+        return "post_planning" in self._hook_impls
 
-    @abc.abstractmethod
     def post_planning(self, response: str) -> str:
         """This method is called after the planning chat completion is done.
 
@@ -99,18 +416,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             str: The resulting response.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_pre_instruction(self) -> bool:
         """This method is called to check that the plugin can
         handle the pre_instruction method.
 
         Returns:
             bool: True if the plugin can handle the pre_instruction method."""
-        return False
+        return "pre_instruction" in self._hook_impls
 
-    @abc.abstractmethod
     def pre_instruction(self, messages: List[Message]) -> List[Message]:
         """This method is called before the instruction chat is done.
 
@@ -120,18 +435,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             List[Message]: The resulting list of messages.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_on_instruction(self) -> bool:
         """This method is called to check that the plugin can
         handle the on_instruction method.
 
         Returns:
             bool: True if the plugin can handle the on_instruction method."""
-        return False
+        return "on_instruction" in self._hook_impls
 
-    @abc.abstractmethod
     def on_instruction(self, messages: List[Message]) -> Optional[str]:
         """This method is called when the instruction chat is done.
 
@@ -141,18 +454,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             Optional[str]: The resulting message.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_post_instruction(self) -> bool:
         """This method is called to check that the plugin can
         handle the post_instruction method.
 
         Returns:
             bool: True if the plugin can handle the post_instruction method."""
-        return False
+        return "post_instruction" in self._hook_impls
 
-    @abc.abstractmethod
     def post_instruction(self, response: str) -> str:
         """This method is called after the instruction chat is done.
 
@@ -162,18 +473,36 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             str: The resulting response.
         """
-        pass
+        raise NotImplementedError
+
+    def can_handle_post_instruction_batch(self) -> bool:
+        """This method is called to check that the plugin can
+        handle the post_instruction_batch method.
+
+        Returns:
+            bool: True if the plugin can handle the post_instruction_batch method."""
+        return "post_instruction_batch" in self._hook_impls
+
+    def post_instruction_batch(
+        self, responses: List[str], channel_id: Optional[int] = None
+    ) -> None:
+        """This method is called once after a batch of instructions is done,
+            instead of calling post_instruction for each of them.
+
+        Args:
+            responses (List[str]): The responses, empty for unfinished ones.
+            channel_id (Optional[int]): The channel the batch belongs to.
+        """
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_pre_command(self) -> bool:
         """This method is called to check that the plugin can
         handle the pre_command method.
 
         Returns:
             bool: True if the plugin can handle the pre_command method."""
-        return False
+        return "pre_command" in self._hook_impls
 
-    @abc.abstractmethod
     def pre_command(
         self, command_name: str, arguments: Dict[str, Any]
     ) -> Tuple[str, Dict[str, Any]]:
@@ -186,18 +515,16 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             Tuple[str, Dict[str, Any]]: The command name and the arguments.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_post_command(self) -> bool:
         """This method is called to check that the plugin can
         handle the post_command method.
 
         Returns:
             bool: True if the plugin can handle the post_command method."""
-        return False
+        return "post_command" in self._hook_impls
 
-    @abc.abstractmethod
     def post_command(self, command_name: str, response: str) -> str:
         """This method is called after the command is executed.
 
@@ -208,11 +535,10 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             str: The resulting response.
         """
-        pass
+        raise NotImplementedError
 
-    @abc.abstractmethod
     def can_handle_chat_completion(
-        self, messages: Dict[Any, Any], model: str, temperature: float, max_tokens: int
+        self, messages: List[Message], model: str, temperature: float, max_tokens: int
     ) -> bool:
         """This method is called to check that the plugin can
           handle the chat_completion method.
@@ -225,9 +551,8 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
 
           Returns:
               bool: True if the plugin can handle the chat_completion method."""
-        return False
+        return "chat_completion" in self._hook_impls
 
-    @abc.abstractmethod
     def handle_chat_completion(
         self, messages: List[Message], model: str, temperature: float, max_tokens: int
     ) -> str:
@@ -242,117 +567,278 @@ class AutoGPTPluginTemplate(AbstractSingleton, metaclass=Singleton):
         Returns:
             str: The resulting response.
         """
-        pass
+        raise NotImplementedError
 
-from discord.ext import commands
-from typing import Any, Dict, List, Optional, Tuple, TypeVar, TypedDict
-class DiscordPlugin(AutoGPTPluginTemplate):
-    def __init__(self, bot_token: str):
-        super().__init__()
-        self._name = "Auto-GPT Discord Plugin"
-        self._version = "0.1.0"
-        self._description = "This plugin enables Auto-GPT to communicate over Discord"
-        self._bot_token = bot_token
-        self._bot = None
-        self._command_prefix = "!"
 
-    async def connect(self):
-        self._bot = commands.Bot(command_prefix=self._command_prefix)
-        await self._bot.login(self._bot_token)
-        await self._bot.connect()
+class _SharedBot:
+    """A Discord bot connection shared by the plugins using the same token."""
 
-    async def on_response(self, response: str, *args, **kwargs) -> str:
-        if self._bot is not None:
-            channel_id = kwargs.get("channel_id")
-            if channel_id:
-                channel = self._bot.get_channel(channel_id)
-                if channel:
-                    await channel.send(response)
-        return response
+    def __init__(self, bot: commands.Bot, gateway: asyncio.Task):
+        self.bot = bot
+        self.gateway = gateway
+        self.refs = 0
 
-    def can_handle_pre_command(self) -> bool:
-        return True
 
-    def pre_command(
-        self, command_name: str, arguments: Dict[str, Any]
-    ) -> Tuple[str, Dict[str, Any]]:
-        if command_name == "hello":
-            return "say_hello", {}
-        return command_name, arguments
+_shared_bots: Dict[str, _SharedBot] = {}
+_shared_bots_locks: MutableMapping[asyncio.AbstractEventLoop, asyncio.Lock] = (
+    weakref.WeakKeyDictionary()
+)
 
-    @commands.command()
-    async def say_hello(self, ctx):
-        await ctx.send("Hello, world!")
 
-    async def run(self):
-        await self.connect()
-        self._bot.add_command(self.say_hello)
-        await self._bot.wait_until_ready()
+def _shared_bots_lock() -> asyncio.Lock:
+    """Get the lock guarding _shared_bots for the running event loop.
 
-    def can_handle_chat_completion(self) -> bool:
-        return False
+    An asyncio.Lock is bound to one event loop, so each loop gets its own.
 
-    def can_handle_on_response(self) -> bool:
-        return True
+    Returns:
+        asyncio.Lock: The lock.
+    """
+    loop = asyncio.get_running_loop()
+    lock = _shared_bots_locks.get(loop)
+    if lock is None:
+        lock = _shared_bots_locks[loop] = asyncio.Lock()
+    return lock
 
-    def handle_chat_completion(
-        self, prompt: str, completions: List[str]
-    ) -> Union[str, List[str]]:
-        return completions
 
-    async def can_handle_on_instruction(
-        self, instruction: str, *args, **kwargs
-    ) -> bool:
-        return False
+async def _acquire_bot(
+    bot_token: str, command_prefix: str, intents: discord.Intents
+) -> commands.Bot:
+    """Get the bot for a token, connecting it on first use.
 
-    async def on_instruction(
-        self, instruction: str, *args, **kwargs
-    ) -> Optional[str]:
-        return None
+    Must be called while holding _shared_bots_lock().
 
-    async def can_handle_pre_instruction(
-        self, instruction: str, *args, **kwargs
-    ) -> bool:
-        return False
+    Args:
+        bot_token (str): The Discord bot token.
+        command_prefix (str): The command prefix, used if the bot is created.
+        intents (discord.Intents): The gateway intents, used if the bot is
+            created.
 
-    async def pre_instruction(
-        self, instruction: str, *args, **kwargs
-    ) -> Tuple[str, List[Union[str, Dict[str, Any]]]]:
-        return instruction, []
+    Returns:
+        commands.Bot: The ready bot.
+    """
+    shared = _shared_bots.get(bot_token)
+    if shared is None:
+        bot = commands.Bot(command_prefix=command_prefix, intents=intents)
+        try:
+            await bot.login(bot_token)
+        except BaseException:
+            await bot.close()
+            raise
+        gateway = asyncio.create_task(bot.connect())
+        ready = asyncio.create_task(bot.wait_until_ready())
+        try:
+            await asyncio.wait((gateway, ready), return_when=asyncio.FIRST_COMPLETED)
+            if not ready.done():
+                gateway.result()
+                raise ConnectionError("Discord gateway closed before being ready")
+        except BaseException:
+            gateway.cancel()
+            ready.cancel()
+            await asyncio.gather(gateway, ready, return_exceptions=True)
+            await bot.close()
+            raise
+        shared = _shared_bots[bot_token] = _SharedBot(bot, gateway)
+    shared.refs += 1
+    return shared.bot
+
+
+async def _release_bot(bot_token: str) -> None:
+    """Drop a reference to the bot for a token, closing it with the last one.
+
+    Must be called while holding _shared_bots_lock().
+
+    Args:
+        bot_token (str): The Discord bot token.
+    """
+    shared = _shared_bots[bot_token]
+    shared.refs -= 1
+    if shared.refs == 0:
+        del _shared_bots[bot_token]
+        await shared.bot.close()
+        shared.gateway.cancel()
+        await asyncio.gather(shared.gateway, return_exceptions=True)
 
-    async def can_handle_post_instruction(
-        self, instruction: str, response: str, *args, **kwargs
-    ) -> bool:
-        return False
 
-    async def post_instruction(
-        self, instruction: str, response: str, *args, **kwargs
-    ) -> Optional[str]:
-        return None
+class DiscordPlugin(AutoGPTPluginTemplate):
+    _name = "Auto-GPT Discord Plugin"
+    _version = "0.1.0"
+    _description = "This plugin enables Auto-GPT to communicate over Discord"
+
+    # Messages sent to a channel within this window are joined into one send,
+    # as long as they stay under Discord's 2000 characters limit.
+    _send_batch_window = 0.02
+    _send_batch_max_chars = 1900
+    # Seconds to wait before trying to connect again after a failure.
+    _connect_retry_delay = 60.0
+
+    # Commands renamed by pre_command, with the function converting their
+    # arguments.
+    _command_aliases: Dict[
+        str, Tuple[str, Callable[[Dict[str, Any]], Dict[str, Any]]]
+    ] = {
+        "hello": ("say_hello", lambda arguments: {}),
+    }
+
+    def __init__(self, bot_token: str, intents: Optional[discord.Intents] = None):
+        super().__init__()
+        self._bot_token = bot_token
+        # Plugins sharing a token share the intents of the first one connecting.
+        self._intents = intents or discord.Intents.default()
+        self._bot: Optional[commands.Bot] = None
+        self._command_prefix = "!"
+        self._pending: Set[asyncio.Task] = set()
+        self._send_queues: Dict[int, asyncio.Queue] = {}
+        self._channel_cache: Dict[int, Any] = {}
+        self._connect_retry_at = 0.0
 
-    async def can_handle_on_planning(
-        self, prompt: str, *args, **kwargs
-    ) -> bool:
-        return False
+    async def connect(self):
+        """Log the bot in and wait until it is ready.
 
-    async def on_planning(
-        self, prompt: str, *args, **kwargs
-    ) -> Optional[str]:
-        return None
+        Plugins using the same token share one bot and its gateway connection,
+        concurrent callers wait for the same connection.
+        """
+        if self._bot is None:
+            async with _shared_bots_lock():
+                if self._bot is None:
+                    bot = await _acquire_bot(
+                        self._bot_token, self._command_prefix, self._intents
+                    )
+                    bot.add_listener(self._on_disconnect, "on_disconnect")
+                    self._bot = bot
 
-    async def can_handle_pre_planning(
-        self, prompt: str, *args, **kwargs
-    ) -> bool:
-        return False
+    async def _on_disconnect(self) -> None:
+        self._channel_cache.clear()
 
-    async def pre_planning(
-        self, prompt: str, *args, **kwargs
+    def _get_channel(self, channel_id: int):
+        """Get a channel from the bot, reusing earlier lookups.
+
+        Args:
+            channel_id (int): The channel id.
+
+        Returns:
+            Optional[discord.abc.Messageable]: The channel, if the bot sees it.
+        """
+        channel = self._channel_cache.get(channel_id)
+        if channel is None and self._bot is not None:
+            channel = self._bot.get_channel(channel_id)
+            if channel is not None:
+                self._channel_cache[channel_id] = channel
+        return channel
+
+    @hook("on_response")
+    async def on_response(self, response: str, channel_id: Optional[int] = None) -> str:
+        if channel_id:
+            await self._send(channel_id, response)
+        return response
+
+    @hook("post_instruction_batch")
+    async def post_instruction_batch(
+        self, responses: List[str], channel_id: Optional[int] = None
+    ) -> None:
+        if channel_id:
+            done = sum(1 for response in responses if response)
+            await self._send(channel_id, f"Batch: {done}/{len(responses)} done")
+
+    async def _send(self, channel_id: int, text: str) -> None:
+        if self._bot is None:
+            now = time.monotonic()
+            if now < self._connect_retry_at:
+                return
+            try:
+                await self.connect()
+            except Exception:  # pylint: disable=broad-except
+                self._connect_retry_at = now + self._connect_retry_delay
+                logger.exception("Discord connection failed")
+                return
+        if self._get_channel(channel_id):
+            sent = self._enqueue_send(channel_id, text)
+            sent.add_done_callback(self._on_send_done)
+
+    def _enqueue_send(self, channel_id: int, text: str) -> asyncio.Future:
+        """Queue a message for the channel's send worker.
+
+        Args:
+            channel_id (int): The channel id.
+            text (str): The message.
+
+        Returns:
+            asyncio.Future: Resolved once the batch holding the message is sent.
+        """
+        queue = self._send_queues.get(channel_id)
+        if queue is None:
+            queue = self._send_queues[channel_id] = asyncio.Queue()
+            worker = asyncio.create_task(self._send_worker(channel_id, queue))
+            self._pending.add(worker)
+            worker.add_done_callback(self._pending.discard)
+        sent = asyncio.get_running_loop().create_future()
+        queue.put_nowait((text, sent))
+        return sent
+
+    async def _send_worker(self, channel_id: int, queue: asyncio.Queue) -> None:
+        carry = None
+        while True:
+            text, sent = carry if carry is not None else await queue.get()
+            carry = None
+            texts, futures = [text], [sent]
+            size = len(text)
+            await asyncio.sleep(self._send_batch_window)
+            while not queue.empty():
+                item = queue.get_nowait()
+                size += len(item[0]) + 1
+                if size > self._send_batch_max_chars:
+                    carry = item
+                    break
+                texts.append(item[0])
+                futures.append(item[1])
+            try:
+                # Looked up per batch, so a reconnect is picked up.
+                channel = self._get_channel(channel_id)
+                if channel is None:
+                    raise LookupError(f"Discord channel {channel_id} not found")
+                await channel.send("\n".join(texts))
+            except Exception as exc:  # pylint: disable=broad-except
+                for future in futures:
+                    future.set_exception(exc)
+            else:
+                for future in futures:
+                    future.set_result(None)
+            finally:
+                for _ in futures:
+                    queue.task_done()
+
+    @staticmethod
+    def _on_send_done(sent: asyncio.Future) -> None:
+        if not sent.cancelled() and sent.exception() is not None:
+            logger.error("Discord send failed", exc_info=sent.exception())
+
+    async def aclose(self) -> None:
+        """Wait for the queued messages to be sent, then release the bot."""
+        await asyncio.gather(*(queue.join() for queue in self._send_queues.values()))
+        if self._bot is not None:
+            self._bot.remove_listener(self._on_disconnect, "on_disconnect")
+            async with _shared_bots_lock():
+                await _release_bot(self._bot_token)
+            self._bot = None
+        for task in self._pending:
+            task.cancel()
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        self._send_queues.clear()
+        self._channel_cache.clear()
+
+    @hook("pre_command")
+    def pre_command(
+        self, command_name: str, arguments: Dict[str, Any]
     ) -> Tuple[str, Dict[str, Any]]:
-        return prompt, {}
+        alias = self._command_aliases.get(command_name)
+        if alias is None:
+            return command_name, arguments
+        alias_name, convert_arguments = alias
+        return alias_name, convert_arguments(arguments)
 
-    async def can_handle_post_planning(
-        self, prompt: str, response: str, *args, **kwargs
-    ) -> bool:
-        return False
+    @commands.command()
+    async def say_hello(self, ctx):
+        await ctx.send("Hello, world!")
 
-   
+    async def run(self):
+        await self.connect()
+        self._bot.add_command(self.say_hello)
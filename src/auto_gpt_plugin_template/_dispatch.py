@@ -0,0 +1,104 @@
+"""Hook constants and the plugin registry used to dispatch hooks."""
+from typing import Dict, FrozenSet, List, Protocol
+
+HOOKS = (
+    "on_response",
+    "post_prompt",
+    "on_planning",
+    "post_planning",
+    "pre_instruction",
+    "on_instruction",
+    "post_instruction",
+    "post_instruction_batch",
+    "pre_command",
+    "post_command",
+    "chat_completion",
+)
+HOOK_BITS = {name: 1 << index for index, name in enumerate(HOOKS)}
+
+H_ON_RESPONSE = HOOK_BITS["on_response"]
+H_POST_PROMPT = HOOK_BITS["post_prompt"]
+H_ON_PLANNING = HOOK_BITS["on_planning"]
+H_POST_PLANNING = HOOK_BITS["post_planning"]
+H_PRE_INSTRUCTION = HOOK_BITS["pre_instruction"]
+H_ON_INSTRUCTION = HOOK_BITS["on_instruction"]
+H_POST_INSTRUCTION = HOOK_BITS["post_instruction"]
+H_POST_INSTRUCTION_BATCH = HOOK_BITS["post_instruction_batch"]
+H_PRE_COMMAND = HOOK_BITS["pre_command"]
+H_POST_COMMAND = HOOK_BITS["post_command"]
+H_CHAT_COMPLETION = HOOK_BITS["chat_completion"]
+
+
+class PluginProtocol(Protocol):
+    """The part of a plugin the registry relies on."""
+
+    @classmethod
+    def declared_hooks(cls) -> FrozenSet[str]:
+        ...
+
+    def hook_mask(self) -> int:
+        ...
+
+    def has_hook(self, hook_id: int) -> bool:
+        ...
+
+
+class PluginRegistry:
+    """
+    Keeps the loaded plugins indexed by the hooks they declare, so the host
+    only visits the subscribers of a hook and can skip building its payload
+    when there are none.
+    """
+
+    def __init__(self) -> None:
+        self._plugins: List[PluginProtocol] = []
+        self._by_hook: Dict[str, List[PluginProtocol]] = {name: [] for name in HOOKS}
+        self._hook_mask: int = 0
+
+    def register(self, plugin: PluginProtocol) -> None:
+        """Add a plugin to the registry.
+
+        Args:
+            plugin (PluginProtocol): The plugin to register.
+        """
+        self._plugins.append(plugin)
+        self._index(plugin)
+
+    def reindex(self) -> None:
+        """Rebuild the hook index from the plugins' current hook masks, e.g.
+        after a plugin's invalidate_capabilities()."""
+        self._by_hook = {name: [] for name in HOOKS}
+        self._hook_mask = 0
+        for plugin in self._plugins:
+            self._index(plugin)
+
+    def _index(self, plugin: PluginProtocol) -> None:
+        for name in plugin.declared_hooks():
+            if plugin.has_hook(HOOK_BITS[name]):
+                self._by_hook[name].append(plugin)
+        self._hook_mask |= plugin.hook_mask()
+
+    def plugins_for(self, hook: str) -> List[PluginProtocol]:
+        """Get the plugins subscribed to a hook.
+
+        Args:
+            hook (str): The hook name, see HOOKS.
+
+        Returns:
+            List[PluginProtocol]: The subscribed plugins."""
+        return self._by_hook[hook]
+
+    @property
+    def plugins(self) -> List[PluginProtocol]:
+        """The registered plugins, in registration order."""
+        return self._plugins
+
+    def has_hook(self, hook_id: int) -> bool:
+        """Check whether any registered plugin handles a hook.
+
+        Args:
+            hook_id (int): One of the H_* hook bits.
+
+        Returns:
+            bool: True if at least one plugin handles the hook."""
+        return bool(self._hook_mask & hook_id)
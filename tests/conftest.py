@@ -0,0 +1,10 @@
+import pytest
+
+from auto_gpt_plugin_template import AutoGPTPluginTemplate
+
+
+@pytest.fixture(autouse=True)
+def fresh_singletons():
+    """Let every test construct its plugins from scratch."""
+    yield
+    AutoGPTPluginTemplate._instances.clear()
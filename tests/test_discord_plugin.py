@@ -0,0 +1,288 @@
+import asyncio
+
+import discord
+import pytest
+from discord.ext import commands
+
+import auto_gpt_plugin_template as template
+from auto_gpt_plugin_template import DiscordPlugin
+
+CHANNEL_ID = 1
+
+
+class FakeChannel:
+    def __init__(self, error=None):
+        self.sent = []
+        self.error = error
+
+    async def send(self, text):
+        if self.error is not None:
+            raise self.error
+        self.sent.append(text)
+
+
+class FakeBot:
+    channels = {}
+    instances = []
+
+    def __init__(self, command_prefix, intents):
+        self.closed = 0
+        self._ready = asyncio.Event()
+        FakeBot.instances.append(self)
+
+    def add_listener(self, func, name):
+        pass
+
+    def remove_listener(self, func, name):
+        pass
+
+    async def login(self, token):
+        pass
+
+    async def connect(self):
+        self._ready.set()
+        await asyncio.Event().wait()
+
+    async def wait_until_ready(self):
+        await self._ready.wait()
+
+    async def close(self):
+        self.closed += 1
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+
+@pytest.fixture
+def channel(monkeypatch):
+    channel = FakeChannel()
+    monkeypatch.setattr(FakeBot, "channels", {CHANNEL_ID: channel})
+    monkeypatch.setattr(FakeBot, "instances", [])
+    monkeypatch.setattr(template.commands, "Bot", FakeBot)
+    return channel
+
+
+def test_burst_is_sent_as_one_message(channel):
+    async def run():
+        plugin = DiscordPlugin("token")
+        for index in range(5):
+            await plugin.on_response(f"message {index}", CHANNEL_ID)
+        await plugin.aclose()
+
+    asyncio.run(run())
+
+    assert channel.sent == ["\n".join(f"message {index}" for index in range(5))]
+
+
+def test_batches_stay_under_the_size_limit(channel):
+    texts = ["a" * 1000, "b" * 800, "c" * 200, "d"]
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        for text in texts:
+            await plugin.on_response(text, CHANNEL_ID)
+        await plugin.aclose()
+
+    asyncio.run(run())
+
+    assert channel.sent == ["a" * 1000 + "\n" + "b" * 800, "c" * 200 + "\nd"]
+    limit = DiscordPlugin._send_batch_max_chars
+    assert all(len(sent) <= limit for sent in channel.sent)
+
+
+def test_send_failure_reaches_the_queued_messages(channel):
+    channel.error = RuntimeError("boom")
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        await plugin.connect()
+        sent = [plugin._enqueue_send(CHANNEL_ID, text) for text in ("a", "b")]
+        results = await asyncio.gather(*sent, return_exceptions=True)
+        await plugin.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert [str(result) for result in results] == ["boom", "boom"]
+
+
+def test_aclose_drains_the_queues(channel):
+    async def run():
+        plugin = DiscordPlugin("token")
+        await plugin.on_response("first", CHANNEL_ID)
+        await plugin.aclose()
+        return plugin
+
+    plugin = asyncio.run(run())
+
+    assert channel.sent == ["first"]
+    assert not plugin._pending
+    assert not plugin._send_queues
+
+
+def test_worker_uses_the_channel_seen_after_a_reconnect(channel):
+    reconnected = FakeChannel()
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        await plugin.on_response("before", CHANNEL_ID)
+        await asyncio.sleep(DiscordPlugin._send_batch_window * 3)
+        await plugin._on_disconnect()
+        FakeBot.channels[CHANNEL_ID] = reconnected
+        await plugin.on_response("after", CHANNEL_ID)
+        await plugin.aclose()
+
+    asyncio.run(run())
+
+    assert channel.sent == ["before"]
+    assert reconnected.sent == ["after"]
+
+
+class FailingLoginBot(FakeBot):
+    logins = 0
+
+    async def login(self, token):
+        FailingLoginBot.logins += 1
+        raise RuntimeError("bad token")
+
+
+def test_failed_connect_is_logged_and_not_retried_at_once(monkeypatch, caplog):
+    monkeypatch.setattr(FakeBot, "instances", [])
+    monkeypatch.setattr(FailingLoginBot, "logins", 0)
+    monkeypatch.setattr(template.commands, "Bot", FailingLoginBot)
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        responses = [await plugin.on_response(f"r{i}", CHANNEL_ID) for i in range(3)]
+        await plugin.aclose()
+        return responses
+
+    assert asyncio.run(run()) == ["r0", "r1", "r2"]
+    assert FailingLoginBot.logins == 1
+    assert [bot.closed for bot in FakeBot.instances] == [1]
+    assert "Discord connection failed" in caplog.text
+
+
+def test_post_instruction_batch_sends_one_summary(channel):
+    async def run():
+        plugin = DiscordPlugin("token")
+        await plugin.post_instruction_batch(["done", "", "done"], CHANNEL_ID)
+        await plugin.aclose()
+
+    asyncio.run(run())
+
+    assert channel.sent == ["Batch: 2/3 done"]
+
+
+def test_shared_bot_is_closed_with_the_last_reference(channel):
+    async def run():
+        async with template._shared_bots_lock():
+            intents = discord.Intents.default()
+            first = await template._acquire_bot("token", "!", intents)
+            second = await template._acquire_bot("token", "!", intents)
+            await template._release_bot("token")
+            closed_early = first.closed
+            await template._release_bot("token")
+        return first, second, closed_early
+
+    first, second, closed_early = asyncio.run(run())
+
+    assert first is second
+    assert closed_early == 0
+    assert first.closed == 1
+    assert not template._shared_bots
+
+
+def test_concurrent_connects_in_successive_event_loops(channel):
+    async def run():
+        plugin = DiscordPlugin("token")
+        await asyncio.gather(plugin.connect(), plugin.connect())
+        await plugin.aclose()
+
+    asyncio.run(run())
+    asyncio.run(run())
+
+    assert [bot.closed for bot in FakeBot.instances] == [1, 1]
+
+
+class OfflineBot(commands.Bot):
+    """The real Bot, with its network calls stubbed out."""
+
+    async def login(self, token):
+        pass
+
+    async def connect(self, *, reconnect=True):
+        await asyncio.Event().wait()
+
+    async def wait_until_ready(self):
+        pass
+
+
+def test_real_bot_accepts_the_constructor_arguments(monkeypatch):
+    monkeypatch.setattr(template.commands, "Bot", OfflineBot)
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        await plugin.connect()
+        bot = plugin._bot
+        await plugin.aclose()
+        return bot
+
+    bot = asyncio.run(run())
+
+    assert isinstance(bot, OfflineBot)
+    assert bot.intents == discord.Intents.default()
+    assert bot.command_prefix == "!"
+
+
+class NeverReadyBot(FakeBot):
+    gateway_cancelled = False
+
+    async def connect(self):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            NeverReadyBot.gateway_cancelled = True
+            raise
+
+
+def test_cancelled_connect_closes_the_bot(monkeypatch):
+    monkeypatch.setattr(FakeBot, "instances", [])
+    monkeypatch.setattr(NeverReadyBot, "gateway_cancelled", False)
+    monkeypatch.setattr(template.commands, "Bot", NeverReadyBot)
+
+    async def run():
+        plugin = DiscordPlugin("token")
+        connecting = asyncio.create_task(plugin.connect())
+        await asyncio.sleep(0.01)
+        connecting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await connecting
+        return plugin
+
+    plugin = asyncio.run(run())
+
+    assert plugin._bot is None
+    assert not template._shared_bots
+    assert [bot.closed for bot in FakeBot.instances] == [1]
+    assert NeverReadyBot.gateway_cancelled
+
+
+def test_pre_command_rewrites_aliases_with_fresh_arguments():
+    plugin = DiscordPlugin("token")
+
+    first = plugin.pre_command("hello", {"x": 1})
+    second = plugin.pre_command("hello", {"x": 1})
+
+    assert first == ("say_hello", {})
+    assert first[1] is not second[1]
+
+
+def test_pre_command_passes_unknown_commands_through():
+    plugin = DiscordPlugin("token")
+    arguments = {"x": 1}
+
+    name, passed = plugin.pre_command("google", arguments)
+
+    assert name == "google"
+    assert passed is arguments
@@ -0,0 +1,158 @@
+import pytest
+
+from auto_gpt_plugin_template import (
+    H_CHAT_COMPLETION,
+    H_ON_RESPONSE,
+    H_POST_COMMAND,
+    H_PRE_COMMAND,
+    AutoGPTPluginTemplate,
+    DiscordPlugin,
+    PluginRegistry,
+    hook,
+)
+
+
+class StatefulPlugin(AutoGPTPluginTemplate):
+    def __init__(self):
+        super().__init__()
+        self._on = True
+
+    def can_handle_on_response(self) -> bool:
+        return self._on
+
+    def on_response(self, response, channel_id=None):
+        return response
+
+
+class NoSuperInitPlugin(AutoGPTPluginTemplate):
+    def __init__(self):  # pylint: disable=super-init-not-called
+        pass
+
+    def can_handle_on_response(self) -> bool:
+        return True
+
+
+def test_hook_mask_uses_state_set_after_super_init():
+    plugin = StatefulPlugin()
+
+    assert plugin.has_hook(H_ON_RESPONSE)
+    assert not plugin.has_hook(H_POST_COMMAND)
+
+
+def test_register_plugin_without_super_init():
+    registry = PluginRegistry()
+    plugin = NoSuperInitPlugin()
+
+    registry.register(plugin)
+
+    assert registry.has_hook(H_ON_RESPONSE)
+    assert registry.plugins_for("on_response") == [plugin]
+
+
+class ConfigurablePlugin(AutoGPTPluginTemplate):
+    def __init__(self):
+        super().__init__()
+        self.post_command_enabled = False
+
+    def can_handle_post_command(self) -> bool:
+        return self.post_command_enabled
+
+    def post_command(self, command_name, response):
+        return response
+
+
+def test_reindex_after_invalidating_capabilities():
+    registry = PluginRegistry()
+    plugin = ConfigurablePlugin()
+    registry.register(plugin)
+    assert not registry.has_hook(H_POST_COMMAND)
+
+    plugin.post_command_enabled = True
+    plugin.invalidate_capabilities()
+    registry.reindex()
+
+    assert registry.has_hook(H_POST_COMMAND)
+    assert registry.plugins_for("post_command") == [plugin]
+
+
+class AliasingDiscordPlugin(DiscordPlugin):
+    def pre_command(self, command_name, arguments):
+        return "overridden", arguments
+
+
+def test_get_hook_returns_the_subclass_override():
+    plugin = AliasingDiscordPlugin("token")
+
+    assert plugin.get_hook("pre_command")("x", {}) == ("overridden", {})
+    assert plugin.has_hook(H_PRE_COMMAND)
+
+
+class ModelPlugin(AutoGPTPluginTemplate):
+    _chat_completion_cache_size = 2
+
+    def __init__(self):
+        super().__init__()
+        self.models = {"gpt-4"}
+        self.asked = []
+
+    def can_handle_chat_completion(self, messages, model, temperature, max_tokens):
+        self.asked.append((model, temperature, max_tokens))
+        return model in self.models
+
+
+def test_chat_completion_answers_are_cached_per_arguments():
+    plugin = ModelPlugin()
+
+    assert plugin.can_handle_chat_completion_cached([], "gpt-4", 0.7, 256)
+    assert plugin.can_handle_chat_completion_cached([], "gpt-4", 0.7, 256)
+    assert not plugin.can_handle_chat_completion_cached([], "gpt-3", 0.7, 256)
+    assert plugin.can_handle_chat_completion_cached([], "gpt-4", 0.2, 256)
+    assert plugin.asked == [
+        ("gpt-4", 0.7, 256),
+        ("gpt-3", 0.7, 256),
+        ("gpt-4", 0.2, 256),
+    ]
+
+    # The least recently used answer was evicted.
+    plugin.can_handle_chat_completion_cached([], "gpt-3", 0.7, 256)
+    assert len(plugin.asked) == 3
+    plugin.can_handle_chat_completion_cached([], "gpt-4", 0.7, 256)
+    assert len(plugin.asked) == 4
+
+    plugin.models.add("gpt-3")
+    plugin.invalidate_capabilities()
+    assert plugin.can_handle_chat_completion_cached([], "gpt-3", 0.7, 256)
+
+
+class DecoratedPlugin(AutoGPTPluginTemplate):
+    @hook("post_command")
+    def post_command(self, command_name, response):
+        return f"{command_name}: {response}"
+
+    @hook("chat_completion")
+    def handle_chat_completion(self, messages, model, temperature, max_tokens):
+        return "completed"
+
+
+def test_legacy_can_handle_calls_reach_the_hook():
+    plugin = DecoratedPlugin()
+
+    assert plugin.can_handle_post_command()
+    assert plugin.post_command("hello", "hi") == "hello: hi"
+    assert plugin.can_handle_chat_completion([], "gpt-4", 0.7, 256)
+    assert plugin.handle_chat_completion([], "gpt-4", 0.7, 256) == "completed"
+    assert plugin.has_hook(H_CHAT_COMPLETION)
+
+
+def test_hook_method_must_be_named_after_the_hook():
+    with pytest.raises(TypeError, match="must be named post_command"):
+
+        class MisnamedPlugin(AutoGPTPluginTemplate):
+            @hook("post_command")
+            def log_command(self, command_name, response):
+                return response
+
+
+def test_unknown_hook_name_is_rejected():
+    with pytest.raises(ValueError, match="Unknown hook: nope"):
+        hook("nope")
@@ -0,0 +1,37 @@
+import copy
+import pickle
+
+from auto_gpt_plugin_template import Message, MessageBatch
+
+
+def test_message_copies():
+    message = Message("user", "hello")
+
+    assert copy.copy(message) == message
+    assert copy.deepcopy([message]) == [message]
+
+
+def test_message_pickles():
+    message = Message("user", "hello")
+
+    assert pickle.loads(pickle.dumps(message)) == message
+
+
+def test_message_batch_splits_the_fields():
+    messages = [Message("system", "Be brief."), Message("user", "hello")]
+
+    batch = MessageBatch(messages)
+
+    assert batch.roles == ["system", "user"]
+    assert batch.contents == ["Be brief.", "hello"]
+    assert len(batch) == 2
+    assert batch.total_chars() == len("Be brief.") + len("hello")
+    assert batch.to_messages() == messages
+
+
+def test_empty_message_batch():
+    batch = MessageBatch([])
+
+    assert len(batch) == 0
+    assert batch.total_chars() == 0
+    assert batch.to_messages() == []
@@ -0,0 +1,25 @@
+from auto_gpt_plugin_template import AutoGPTPluginTemplate, DiscordPlugin
+
+
+class InstanceMetadataPlugin(AutoGPTPluginTemplate):
+    def __init__(self):
+        super().__init__()
+        self._name = "Instance plugin"
+        self._version = "1.2.3"
+        self._description = "Sets its metadata in __init__."
+
+
+def test_descriptor_reads_class_attributes():
+    assert DiscordPlugin("token").descriptor() == (
+        "Auto-GPT Discord Plugin",
+        "0.1.0",
+        "This plugin enables Auto-GPT to communicate over Discord",
+    )
+
+
+def test_descriptor_reads_instance_attributes():
+    assert InstanceMetadataPlugin().descriptor() == (
+        "Instance plugin",
+        "1.2.3",
+        "Sets its metadata in __init__.",
+    )